@@ -0,0 +1,29 @@
+import importlib
+
+import pytest
+from starlette.testclient import TestClient
+
+import ui_server
+
+
+@pytest.fixture
+def gzip_client(monkeypatch):
+    # ui_server reads its settings at import time, so reload it with the test's env and
+    # reload it again afterwards so later tests see the defaults.
+    monkeypatch.setenv("UI_PROXY_API", "0")
+    monkeypatch.setenv("UI_GZIP_MIN_BYTES", "16")
+    yield TestClient(importlib.reload(ui_server).app)
+    monkeypatch.undo()
+    importlib.reload(ui_server)
+
+
+def test_gzip_does_not_leak_into_later_responses(gzip_client):
+    first = gzip_client.get("/api/status", headers={"accept-encoding": "gzip"})
+    second = gzip_client.get("/api/status", headers={"accept-encoding": "gzip"})
+    plain = gzip_client.get("/api/status", headers={"accept-encoding": "identity"})
+
+    assert first.status_code == second.status_code == plain.status_code == 404
+    assert first.headers == second.headers
+    assert first.headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in plain.headers
+    assert plain.content == b"UI_PROXY_API disabled"
@@ -0,0 +1,94 @@
+import asyncio
+
+import anyio
+import pytest
+
+from ui_server import _SSE_COALESCE_MAX_BYTES, _coalesce_chunks
+
+
+class FakeSource:
+    """Async chunk source: yields `plan` entries of (delay, bytes or exception)."""
+
+    def __init__(self, plan, hang=False):
+        self.plan = plan
+        self.hang = hang
+        self.closed = False
+
+    async def __call__(self):
+        try:
+            for delay, data in self.plan:
+                await asyncio.sleep(delay)
+                if isinstance(data, Exception):
+                    raise data
+                yield data
+            if self.hang:
+                await asyncio.sleep(3600)
+        finally:
+            # Like an HTTP client's read, cleanup takes a few loop turns.
+            for _ in range(5):
+                await asyncio.sleep(0)
+            self.closed = True
+
+
+async def _collect(source, window):
+    out = []
+    loop = asyncio.get_running_loop()
+    t0 = loop.time()
+    async for chunk in _coalesce_chunks(source(), window):
+        out.append((loop.time() - t0, chunk))
+    return out
+
+
+def test_chunks_within_window_are_merged():
+    source = FakeSource([(0, b"data: 1\n\n"), (0.01, b"data: 2\n\n"), (0.01, b"data: 3\n\n")])
+    out = asyncio.run(_collect(source, 0.2))
+    assert [c for _, c in out] == [b"data: 1\n\ndata: 2\n\ndata: 3\n\n"]
+    assert source.closed
+
+
+def test_partial_event_is_carried_to_the_next_write():
+    source = FakeSource([(0, b"data: 1\n\n"), (0.01, b"data: par"), (0.3, b"tial\n\n")])
+    out = asyncio.run(_collect(source, 0.05))
+    assert [c for _, c in out] == [b"data: 1\n\n", b"data: partial\n\n"]
+    # The complete event goes out when the window closes, not with the partial one.
+    assert out[0][0] < 0.2
+
+
+def test_writes_are_capped():
+    event = b"data: " + b"x" * 10000 + b"\n\n"
+    out = asyncio.run(_collect(FakeSource([(0, event)] * 4), 0.05))
+    assert b"".join(c for _, c in out) == event * 4
+    assert len(out) > 1
+    assert all(len(c) <= _SSE_COALESCE_MAX_BYTES for _, c in out)
+
+
+def test_upstream_error_is_reraised_after_buffered_data():
+    source = FakeSource([(0, b"data: 1\n\n"), (0.01, RuntimeError("boom"))])
+    out = []
+
+    async def main():
+        async for chunk in _coalesce_chunks(source(), 0.05):
+            out.append(chunk)
+
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(main())
+    assert out == [b"data: 1\n\n"]
+
+
+def test_cancelled_consumer_closes_source_and_leaves_no_task():
+    source = FakeSource([(0, b"data: 1\n\n")], hang=True)
+
+    async def main():
+        # Cancelled the way Starlette cancels a stream when the browser disconnects.
+        with anyio.CancelScope() as scope:
+            chunks = _coalesce_chunks(source(), 0.01)
+            try:
+                async for _ in chunks:
+                    scope.cancel()
+            finally:
+                await chunks.aclose()
+        assert scope.cancelled_caught
+        assert source.closed
+        assert [t for t in asyncio.all_tasks() if t is not asyncio.current_task()] == []
+
+    asyncio.run(main())
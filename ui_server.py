@@ -1,23 +1,70 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import asyncio
+import gzip
+import hashlib
 import html
+import http.cookiejar
+import ipaddress
 import json
 import logging
 import os
+import socket
 import sqlite3
+import sys
 import time
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote, urlsplit, urlunsplit
 
 from logging_setup import setup_logging
 
-from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, Response, StreamingResponse, RedirectResponse
+import anyio
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.requests import Request
+from starlette.responses import FileResponse, HTMLResponse, Response, StreamingResponse, RedirectResponse
+from starlette.routing import Route
+
+try:
+    import brotli  # optional: enables br-encoded variants of the precompressed pages
+except ImportError:
+    brotli = None
+
+try:
+    import orjson  # optional: faster decoding of the stored event JSON
+except ImportError:
+    orjson = None
+
+try:
+    import rjsmin  # optional: minify the embedded JS bundles once at import
+except ImportError:
+    rjsmin = None
+
+try:
+    import rcssmin  # optional: minify the React page stylesheet once at import
+except ImportError:
+    rcssmin = None
+
+
+def _json_loads(s: str) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            # The ingester writes with json.dumps defaults, so NaN/Infinity can appear;
+            # orjson rejects them and json accepts them.
+            pass
+    return json.loads(s)
 
 
 logger = logging.getLogger("ui")
 
 
+# Config helpers. Only used while the module is imported (and at startup): every setting
+# below is read once into a module constant, and request handlers only see constants.
 def _env(name: str, default: str = "") -> str:
     v = os.getenv(name)
     return default if v is None else v
@@ -33,9 +80,26 @@ def _env_int(name: str, default: int) -> int:
         return default
 
 
+def _env_float(name: str, default: float) -> float:
+    v = os.getenv(name)
+    if v is None or v == "":
+        return default
+    try:
+        return float(v)
+    except Exception:
+        return default
+
+
+_TRUTHY = frozenset(("1", "true", "yes", "y", "on"))
+_FALSY = frozenset(("0", "false", "no", "n", "off"))
+
+
 def _env_bool(name: str, default: str = "0") -> bool:
-    v = _env(name, default).strip().lower()
-    return v in ("1", "true", "yes", "y", "on")
+    v = _env(name, default)
+    # Common case: value is already a canonical literal, no need to normalise.
+    if v in _TRUTHY:
+        return True
+    return v.strip().lower() in _TRUTHY
 
 
 def _q_int(request: Request, *names: str, default: Optional[int] = None) -> Optional[int]:
@@ -58,9 +122,9 @@ def _q_bool(request: Request, *names: str, default: bool = False) -> bool:
     for n in names:
         if n in qp:
             raw = str(qp.get(n, "")).strip().lower()
-            if raw in ("1", "true", "yes", "y", "on"):
+            if raw in _TRUTHY:
                 return True
-            if raw in ("0", "false", "no", "n", "off"):
+            if raw in _FALSY:
                 return False
             # presence without value => True
             return True
@@ -69,21 +133,82 @@ def _q_bool(request: Request, *names: str, default: bool = False) -> bool:
 
 API_UPSTREAM = _env("UI_API_UPSTREAM", _env("UI_API_BASE", "http://127.0.0.1:8001")).rstrip("/")
 UI_PROXY_API = _env_bool("UI_PROXY_API", "1")
+# Optional: send EventSource clients straight to the API with a 307 instead of relaying
+# the long-lived stream through this process. The target must be reachable from the
+# browser and allow the UI origin in API_CORS_ORIGINS.
+UI_SSE_DIRECT = _env_bool("UI_SSE_DIRECT", "0")
+_SSE_DIRECT_BASE = _env("UI_API_BASE", API_UPSTREAM).rstrip("/")
+# Optional write coalescing for relayed SSE: bursts of small upstream chunks arriving
+# within this many milliseconds are sent to the browser as one write. 0 = off.
+UI_SSE_COALESCE_SEC = max(0, _env_int("UI_SSE_COALESCE_MS", 0)) / 1000.0
+# Upstream connection pool. Each open SSE stream pins one connection for its lifetime,
+# so the pool must comfortably exceed the number of browser tabs left open.
+UI_UPSTREAM_MAX_CONNECTIONS = _env_int("UI_UPSTREAM_MAX_CONNECTIONS", 512)
+UI_UPSTREAM_MAX_KEEPALIVE = _env_int("UI_UPSTREAM_MAX_KEEPALIVE", 256)
+UI_UPSTREAM_KEEPALIVE_SEC = _env_float("UI_UPSTREAM_KEEPALIVE_SEC", 60.0)
+UI_UPSTREAM_CONNECT_TIMEOUT_SEC = _env_float("UI_UPSTREAM_CONNECT_TIMEOUT_SEC", 5.0)
+UI_UPSTREAM_HTTP2 = _env_bool("UI_UPSTREAM_HTTP2", "0")
+UI_UPSTREAM_PIN_DNS = _env_bool("UI_UPSTREAM_PIN_DNS", "0")
+# HTTP client used for the upstream: "httpx" (default) or "aiohttp" (C-accelerated
+# parser and connector pool; worth trying with many concurrent tabs).
+UI_PROXY_CLIENT = _env("UI_PROXY_CLIENT", "httpx").strip().lower()
+# gzip for dynamic responses (proxied JSON, classic page) of at least this many bytes.
+# 0 = off. SSE and already-encoded upstream responses are never recompressed.
+UI_GZIP_MIN_BYTES = max(0, _env_int("UI_GZIP_MIN_BYTES", 1024))
+
+
+def _pin_upstream(base: str) -> Tuple[str, Optional[bytes]]:
+    """Resolve an http:// upstream hostname once and return (base with IP, Host header).
+
+    New pooled connections then connect to the IP without a getaddrinfo() each time,
+    while the upstream still sees its real name in Host. IP literals and https://
+    upstreams (which need the name for SNI/cert checks) are returned unchanged.
+    """
+    parts = urlsplit(base)
+    host = parts.hostname
+    if parts.scheme != "http" or not host:
+        return base, None
+    try:
+        ipaddress.ip_address(host)
+        return base, None
+    except ValueError:
+        pass
+    try:
+        infos = socket.getaddrinfo(host, parts.port or 80, type=socket.SOCK_STREAM)
+    except OSError:
+        logger.warning("upstream DNS pin failed host=%s; resolving per connection", host)
+        return base, None
+    ip = infos[0][4][0]
+    userinfo, at, host_port = parts.netloc.rpartition("@")
+    ip_host = f"[{ip}]" if ":" in ip else ip
+    netloc = userinfo + at + (ip_host if parts.port is None else f"{ip_host}:{parts.port}")
+    return urlunsplit(parts._replace(netloc=netloc)), host_port.encode("latin-1")
+
+
+if UI_UPSTREAM_PIN_DNS:
+    _UPSTREAM_BASE, _UPSTREAM_HOST_HEADER = _pin_upstream(API_UPSTREAM)
+else:
+    _UPSTREAM_BASE, _UPSTREAM_HOST_HEADER = API_UPSTREAM, None
 DB_PATH = _env("UI_DB_PATH", _env("API_DB_PATH", _env("INGEST_DB_PATH", "data/events.sqlite3")))
 UI_REFRESH_SEC_DEFAULT = _env_int("UI_REFRESH_SEC", 0)
 BUILD_ID = _env("UI_BUILD_ID", str(int(time.time())))
 UI_REACT_CDN_FALLBACK = _env_bool("UI_REACT_CDN_FALLBACK", "1")
+UI_HOST = _env("UI_HOST", "0.0.0.0")
+UI_PORT = _env_int("UI_PORT", 8000)
+UI_WORKERS = max(1, _env_int("UI_WORKERS", 1))
+UI_EVENT_LOOP = _env("UI_EVENT_LOOP").strip().lower()
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 STATIC_DIR = os.path.join(BASE_DIR, "ui_static")
 VENDOR_DIR = os.path.join(STATIC_DIR, "vendor")
 
-app = FastAPI(title="GoodWe Control UI")
-_httpx_client = None  # created lazily on first request
+# Per-request access logging (uvicorn access log + httpx's "HTTP Request" lines). Off by
+# default; when on, long-lived /api/sse/* connections are still left out.
+UI_ACCESS_LOG = _env_bool("UI_ACCESS_LOG", "0")
 
 
-def _hop_by_hop_headers() -> set:
-    return {
+_HOP_BY_HOP: frozenset[str] = frozenset(
+    {
         "connection",
         "keep-alive",
         "proxy-authenticate",
@@ -94,97 +219,402 @@ def _hop_by_hop_headers() -> set:
         "upgrade",
         "host",
     }
-
-
-def _filter_headers(headers: Iterable[tuple[str, str]]) -> Dict[str, str]:
-    bad = _hop_by_hop_headers()
-    out: Dict[str, str] = {}
-    for k, v in headers:
+)
+_HOP_BY_HOP_RAW = frozenset(h.encode("latin-1") for h in _HOP_BY_HOP)
+# Response side also drops content-length: Starlette sizes buffered bodies itself and
+# streams are re-chunked. Kept separate because a request's content-length must survive.
+_RESPONSE_DROP_RAW = _HOP_BY_HOP_RAW | {b"content-length"}
+
+
+def _filter_raw(raw: Iterable[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    # Works on the ASGI (bytes, bytes) header list directly: no str decode/encode round
+    # trip, and repeated headers are kept as separate entries. The ASGI spec requires
+    # servers to lowercase header names, so no per-header lower() is needed here.
+    return [(k, v) for k, v in raw if k not in _HOP_BY_HOP_RAW]
+
+
+def _filter_response_headers(
+    raw: Iterable[Tuple[bytes, bytes]],
+    defaults: Tuple[Tuple[bytes, bytes], ...],
+    drop: frozenset = _RESPONSE_DROP_RAW,
+) -> List[Tuple[bytes, bytes]]:
+    # Single pass over the upstream's raw header list, producing ASGI raw headers for
+    # the outgoing response. Headers in `drop` (hop-by-hop and content-length by
+    # default) are removed, repeated headers such as set-cookie are kept, and
+    # `defaults` fill in anything missing.
+    out: List[Tuple[bytes, bytes]] = []
+    seen = set()
+    for k, v in raw:
+        # Both clients keep the upstream's original casing in raw headers, so this
+        # side does need bytes.lower() (C-level and ASCII-only, like a translate table).
         lk = k.lower()
-        if lk in bad:
+        if lk in drop:
             continue
-        out[k] = v
+        seen.add(lk)
+        out.append((lk, v))
+    for k, v in defaults:
+        if k not in seen:
+            out.append((k, v))
     return out
 
 
-async def _get_httpx():
-    global _httpx_client
-    if _httpx_client is None:
-        import httpx
+_API_RESPONSE_DEFAULTS = ((b"cache-control", b"no-store"),)
+_SSE_RESPONSE_DEFAULTS = ((b"cache-control", b"no-cache"), (b"x-accel-buffering", b"no"))
 
-        _httpx_client = httpx.AsyncClient(timeout=None)
-    return _httpx_client
 
+def _make_httpx_client() -> Any:
+    import httpx
 
-@app.on_event("shutdown")
-async def _shutdown_httpx() -> None:
-    global _httpx_client
-    if _httpx_client is not None:
-        try:
-            await _httpx_client.aclose()
-        finally:
-            _httpx_client = None
+    transport = httpx.AsyncHTTPTransport(
+        # HTTP/2 is only negotiated (via ALPN) for https upstreams and needs `h2`.
+        http2=UI_UPSTREAM_HTTP2,
+        limits=httpx.Limits(
+            max_connections=UI_UPSTREAM_MAX_CONNECTIONS,
+            max_keepalive_connections=UI_UPSTREAM_MAX_KEEPALIVE,
+            keepalive_expiry=UI_UPSTREAM_KEEPALIVE_SEC,
+        ),
+        # Small SSE frames must not wait on Nagle. asyncio usually sets this already;
+        # be explicit so it holds for every event loop implementation.
+        socket_options=[(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)],
+    )
+    # Reads stay unbounded (SSE streams idle between events); only connecting is capped
+    # so a dead upstream fails fast with a 502 instead of hanging the request.
+    connect = UI_UPSTREAM_CONNECT_TIMEOUT_SEC if UI_UPSTREAM_CONNECT_TIMEOUT_SEC > 0 else None
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(None, connect=connect),
+        transport=transport,
+        # Bodies are forwarded undecoded, so never ask for an encoding the browser did
+        # not (its own accept-encoding overrides this default).
+        headers={"accept-encoding": "identity"},
+        # A shared client must not keep one browser's cookies and replay them for others.
+        cookies=http.cookiejar.CookieJar(http.cookiejar.DefaultCookiePolicy(allowed_domains=[])),
+    )
+
+
+def _make_aiohttp_session() -> Any:
+    import aiohttp
+
+    connect = UI_UPSTREAM_CONNECT_TIMEOUT_SEC if UI_UPSTREAM_CONNECT_TIMEOUT_SEC > 0 else None
+    # aiohttp has no separate keep-alive cap; idle connections count towards `limit`.
+    # TCP_NODELAY is set by aiohttp on every connection.
+    connector = aiohttp.TCPConnector(
+        limit=UI_UPSTREAM_MAX_CONNECTIONS,
+        keepalive_timeout=UI_UPSTREAM_KEEPALIVE_SEC,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=None, sock_connect=connect),
+        # Same rules as the httpx client: raw bytes through, no invented
+        # accept-encoding, and no cookie jar shared between browsers.
+        auto_decompress=False,
+        skip_auto_headers=("accept-encoding",),
+        cookie_jar=aiohttp.DummyCookieJar(),
+    )
 
 
-@app.api_route("/api/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"])  # type: ignore[misc]
-async def proxy_api(path: str, request: Request) -> Response:
+class _SkipSSEAccessLog(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        return "/api/sse/" not in record.getMessage()
+
+
+def _configure_access_logging() -> None:
+    if UI_ACCESS_LOG:
+        for name in ("uvicorn.access", "httpx"):
+            logging.getLogger(name).addFilter(_SkipSSEAccessLog())
+    else:
+        # httpx logs every upstream request at INFO; that is an access log by another name.
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+@asynccontextmanager
+async def _lifespan(app: Starlette) -> AsyncIterator[None]:
+    if _env("UI_WORKER_LOGGING") == "1":
+        # Workers log to stdout only: several processes rotating one LOG_DIR/ui.log would
+        # clobber each other's lines. The parent process keeps the file.
+        os.environ["LOG_TO_FILE"] = "0"
+        setup_logging("ui", debug_default=_env_bool("DEBUG", ""))
+        _configure_access_logging()
     if not UI_PROXY_API:
-        return Response(status_code=404, content=b"UI_PROXY_API disabled")
+        # Proxy handlers bail out before touching app.state, so no client is needed.
+        yield
+        return
+    # One client per process, created before the first request and closed on shutdown;
+    # handlers read it from app.state with no lazy-init check.
+    make = _make_aiohttp_session if UI_PROXY_CLIENT == "aiohttp" else _make_httpx_client
+    async with make() as client:
+        app.state.upstream = client
+        yield
+
+
+_IDENTITY = (b"accept-encoding", b"identity")
+
+
+def _request_target(request: Request) -> str:
+    # The proxied routes mirror the upstream's /api/ paths, so the browser's own request
+    # target is reused. raw_path is still percent-encoded (path_params holds the decoded
+    # form), so escapes like %20, %2F or %25 reach the upstream exactly as sent.
+    raw = request.scope.get("raw_path")
+    target = raw.decode("latin-1") if raw else quote(request.scope["path"])
+    # Forward the query string verbatim: no dict round-trip, and repeated keys survive.
+    qs = request.scope["query_string"]
+    if qs:
+        target += "?" + qs.decode("latin-1")
+    return target
+
+
+def _upstream_headers(request: Request, sse: bool) -> List[Tuple[bytes, bytes]]:
+    headers = _filter_raw(request.headers.raw)
+    if sse:
+        # Event streams must reach the browser uncompressed and unbuffered.
+        headers = [(k, v) for k, v in headers if k != b"accept-encoding"]
+        headers.append(_IDENTITY)
+    if _UPSTREAM_HOST_HEADER is not None:
+        headers.append((b"host", _UPSTREAM_HOST_HEADER))
+    return headers
+
+
+def _upstream_body(request: Request) -> Optional[AsyncIterator[bytes]]:
+    # Pipe the body straight through rather than buffering it with request.body().
+    # The client's content-length (if any) is forwarded, so the HTTP client only falls
+    # back to chunked transfer-encoding when the browser itself sent a chunked body.
+    # Whether a body is forwarded depends only on what the client announced, never on
+    # the method: a GET with a body must still send the bytes its content-length promises.
+    h = request.headers
+    if "transfer-encoding" in h or h.get("content-length", "0") != "0":
+        return request.stream()
+    return None
+
+
+# What the handlers get back from either client: status, the upstream's raw response
+# headers, an iterator over the undecoded body, and a coroutine function that releases
+# the connection.
+_Upstream = Tuple[int, Iterable[Tuple[bytes, bytes]], AsyncIterator[bytes], Callable[[], Awaitable[None]]]
+
+
+async def _send_httpx(request: Request, sse: bool) -> _Upstream:
+    client = request.app.state.upstream
+    req = client.build_request(
+        request.method,
+        _UPSTREAM_BASE + _request_target(request),
+        content=_upstream_body(request),
+        headers=_upstream_headers(request, sse),
+    )
+    resp = await client.send(req, stream=True)
+    # aiter_raw(): no decoder pass and no re-chunking (a fixed chunk_size would hold
+    # SSE events back until the buffer fills). It never yields empty chunks.
+    return resp.status_code, resp.headers.raw, resp.aiter_raw(), resp.aclose
+
+
+async def _send_aiohttp(request: Request, sse: bool) -> _Upstream:
+    import yarl
+
+    session = request.app.state.upstream
+    resp = await session.request(
+        request.method,
+        # encoded=True: send path and query exactly as received, no requoting.
+        yarl.URL(_UPSTREAM_BASE + _request_target(request), encoded=True),
+        data=_upstream_body(request),
+        headers=[(k.decode("latin-1"), v.decode("latin-1")) for k, v in _upstream_headers(request, sse)],
+        allow_redirects=False,
+    )
+
+    async def close() -> None:
+        # Returns the connection to the pool, or closes it if the body was not drained.
+        resp.release()
+
+    # iter_any() yields whatever has arrived, never an empty chunk.
+    return resp.status, resp.raw_headers, resp.content.iter_any(), close
+
+
+_send_upstream = _send_aiohttp if UI_PROXY_CLIENT == "aiohttp" else _send_httpx
 
-    url = f"{API_UPSTREAM}/api/{path}"
 
-    client = await _get_httpx()
+# Fixed replies are built per request, never shared: GZipMiddleware (on the
+# /api/{path:path} route) rewrites the headers of the response it wraps in place.
+_DISABLED_BODY = b"UI_PROXY_API disabled"
+_UPSTREAM_ERROR_PREFIX = b"Upstream API error: "
 
-    body = await request.body()
-    headers = _filter_headers(request.headers.items())
-    params = dict(request.query_params)
 
-    accept = (request.headers.get("accept") or "").lower()
-    want_stream = path.startswith("sse/") or ("text/event-stream" in accept)
+def _proxy_disabled() -> Response:
+    return Response(status_code=404, content=_DISABLED_BODY)
 
+
+def _upstream_error(e: Exception) -> Response:
+    return Response(status_code=502, content=_UPSTREAM_ERROR_PREFIX + str(e).encode("utf-8"))
+
+
+# SSE and plain JSON calls get separate routes so each handler has a single code path
+# (see the route table at the bottom of the module).
+_PROXY_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
+# Plain OPTIONS (not a CORS preflight) is answered here without an upstream round trip.
+# Preflights are still forwarded so API_CORS_ORIGINS on the API stays the only place
+# that can grant a foreign origin access; this proxy never reflects Origin itself.
+_OPTIONS_ALLOW = ", ".join(_PROXY_METHODS)
+
+
+_SSE_COALESCE_MAX_BYTES = 32 * 1024
+# A blank line ends an event (SSE allows \n, \r\n or \r line endings).
+_SSE_EVENT_ENDS = (b"\n\n", b"\r\n\r\n", b"\r\r")
+_STREAM_END = object()
+
+
+def _sse_complete_len(buf: bytearray) -> int:
+    """Length of the leading part of `buf` made of complete events (0 if none)."""
+    end = 0
+    for sep in _SSE_EVENT_ENDS:
+        i = buf.rfind(sep)
+        if i >= 0:
+            end = max(end, i + len(sep))
+    return end
+
+
+async def _coalesce_chunks(chunks: AsyncIterator[bytes], window: float) -> AsyncIterator[bytes]:
+    """Merge upstream chunks arriving within `window` seconds into a single write.
+
+    A reader task feeds a small queue so that waiting for "more data" can time out
+    without cancelling an in-flight upstream read (which would close the upstream stream).
+    Chunks already queued are always merged, even past the deadline. Writes are aligned
+    to event boundaries: when the window closes, every complete event buffered so far
+    is written and only a trailing partial event (which the browser cannot dispatch
+    yet) is carried over to wait for the rest of its bytes. Merging stops before a
+    write would grow past _SSE_COALESCE_MAX_BYTES; a single larger upstream chunk is
+    still passed on whole.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=64)
+
+    async def pump() -> None:
+        try:
+            async for c in chunks:
+                await queue.put(c)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put(e)
+            return
+        await queue.put(_STREAM_END)
+
+    task = asyncio.create_task(pump())
+    loop = asyncio.get_running_loop()
+    buf = bytearray()
+    item: Any = None
     try:
-        req = client.build_request(
-            request.method,
-            url,
-            params=params,
-            content=body if body else None,
-            headers=headers,
-        )
+        while True:
+            # Nothing buffered, or only part of an event: wait for more without a deadline.
+            if not _sse_complete_len(buf) and len(buf) < _SSE_COALESCE_MAX_BYTES:
+                item = await queue.get()
+                if item is _STREAM_END or isinstance(item, Exception):
+                    break
+                buf += item
+                item = None
+            deadline = loop.time() + window
+            while len(buf) < _SSE_COALESCE_MAX_BYTES:
+                if not queue.empty():
+                    item = queue.get_nowait()
+                else:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _STREAM_END or isinstance(item, Exception):
+                    break
+                if len(buf) + len(item) > _SSE_COALESCE_MAX_BYTES:
+                    break  # `item` starts the next write
+                buf += item
+                item = None
+            if item is _STREAM_END or isinstance(item, Exception):
+                break
+            n = _sse_complete_len(buf)
+            if not n and (item is not None or len(buf) >= _SSE_COALESCE_MAX_BYTES):
+                n = len(buf)  # full and still no event boundary: write what there is
+            if n:
+                yield bytes(buf[:n])
+                del buf[:n]
+            if item is not None:
+                buf += item
+                item = None
+        if buf:
+            yield bytes(buf)
+        if isinstance(item, Exception):
+            raise item
+    finally:
+        task.cancel()
+        # Wait for the reader even when our caller is being cancelled (browser gone):
+        # Starlette's cancel scope would interrupt a plain `await task` at once, and the
+        # response would then be closed under a read still in flight, leaving the upstream
+        # connection checked out of the pool. asyncio.wait never raises the reader's own
+        # cancellation, so a cancellation of the caller still propagates afterwards.
+        with anyio.CancelScope(shield=True):
+            await asyncio.wait((task,))
 
-        if not want_stream:
-            resp = await client.send(req, stream=False)
-            resp_headers = _filter_headers(resp.headers.items())
-            resp_headers.setdefault("cache-control", "no-store")
-            return Response(
-                content=resp.content,
-                status_code=resp.status_code,
-                headers=resp_headers,
-                media_type=resp.headers.get("content-type"),
-            )
-
-        resp = await client.send(req, stream=True)
-        resp_headers = _filter_headers(resp.headers.items())
-        resp_headers.pop("content-length", None)
-        resp_headers.setdefault("cache-control", "no-cache")
-        resp_headers.setdefault("x-accel-buffering", "no")
+
+async def proxy_sse(request: Request) -> Response:
+    if not UI_PROXY_API:
+        return _proxy_disabled()
+
+    if UI_SSE_DIRECT:
+        return RedirectResponse(_SSE_DIRECT_BASE + _request_target(request), status_code=307)
+
+    path = "sse/" + request.path_params["path"]
+    try:
+        status, raw_headers, body, close = await _send_upstream(request, True)
+        resp_headers = _filter_response_headers(raw_headers, _SSE_RESPONSE_DEFAULTS)
 
         async def gen():
+            # Raw upstream bytes; any content-encoding header is forwarded unchanged
+            # with them. Neither client nor the coalescer yields empty chunks.
+            chunks = body
+            if UI_SSE_COALESCE_SEC > 0:
+                chunks = _coalesce_chunks(body, UI_SSE_COALESCE_SEC)
             try:
-                async for chunk in resp.aiter_bytes():
-                    if chunk:
-                        yield chunk
+                async for chunk in chunks:
+                    yield chunk
             finally:
-                await resp.aclose()
+                try:
+                    if chunks is not body:
+                        await chunks.aclose()
+                finally:
+                    await close()
+
+        out = StreamingResponse(gen(), status_code=status)
+        out.raw_headers.extend(resp_headers)
+        return out
+    except Exception as e:
+        logger.exception("proxy_sse upstream error path=%s", path)
+        return _upstream_error(e)
 
-        return StreamingResponse(
-            gen(),
-            status_code=resp.status_code,
-            headers=resp_headers,
-            media_type=resp.headers.get("content-type"),
-        )
+
+async def proxy_api(request: Request) -> Response:
+    if not UI_PROXY_API:
+        return _proxy_disabled()
+
+    if request.method == "OPTIONS" and "access-control-request-method" not in request.headers:
+        return Response(status_code=204, headers={"allow": _OPTIONS_ALLOW})
+
+    path = request.path_params["path"]
+    try:
+        status, raw_headers, body, close = await _send_upstream(request, False)
+        try:
+            # Raw bytes: no decoder pass, and a compressed upstream body stays
+            # consistent with the content-encoding passed through.
+            content = b"".join([chunk async for chunk in body])
+        finally:
+            await close()
+        # Starlette only adds content-length here (no media_type, no headers); the
+        # upstream's headers, content-type included, are appended as-is.
+        out = Response(content=content, status_code=status)
+        if request.method == "HEAD":
+            # No body came back to size, so keep the upstream's content-length (the size
+            # a GET would return) in place of Starlette's 0.
+            out.raw_headers = _filter_response_headers(raw_headers, _API_RESPONSE_DEFAULTS, _HOP_BY_HOP_RAW)
+        else:
+            out.raw_headers.extend(_filter_response_headers(raw_headers, _API_RESPONSE_DEFAULTS))
+        return out
     except Exception as e:
-        logger.exception("proxy_api upstream error method=%s path=%s url=%s", request.method, path, url)
-        return Response(status_code=502, content=f"Upstream API error: {e}".encode("utf-8"))
+        logger.exception("proxy_api upstream error method=%s path=%s", request.method, path)
+        return _upstream_error(e)
 
 
 def _db_connect(db_path: str) -> sqlite3.Connection:
@@ -203,7 +633,7 @@ def _row_to_event(row: sqlite3.Row) -> Dict[str, Any]:
     data_json = d.get("data_json")
     if isinstance(data_json, str):
         try:
-            d["data"] = json.loads(data_json)
+            d["data"] = _json_loads(data_json)
         except Exception:
             d["data"] = None
     else:
@@ -545,12 +975,47 @@ _JS_TEMPLATE = """(function() {
       '<td>' + fmt(dec.want_pct, '%') + '</td>' +
       '<td>' + String((dec.reason || '')).slice(0, 80) + '</td>';
 
+    pendingRows.push({ id: id, tr: tr });
+    // Only the newest MAX_ROWS can ever be shown (e.g. a backlog while the tab was hidden).
+    while (pendingRows.length > MAX_ROWS) delete seenIds[pendingRows.shift().id];
+    scheduleFlush();
+  }
+
+  // SSE-driven DOM updates are queued and applied once per animation frame, so a burst
+  // of events costs one table update and one log write instead of one per event.
+  var MAX_ROWS = 50;
+  var MAX_LOG_LINES = 200;
+  var pendingRows = [];
+  var logLines = [];
+  var logDirty = false;
+  var flushScheduled = false;
+
+  function scheduleFlush() {
+    if (flushScheduled) return;
+    flushScheduled = true;
+    if (window.requestAnimationFrame) window.requestAnimationFrame(flushPending);
+    else setTimeout(flushPending, 16);
+  }
+
+  function flushPending() {
+    flushScheduled = false;
+    if (pendingRows.length) flushRows();
+    if (logDirty) flushLog();
+  }
+
+  function flushRows() {
     var rows = $('rows');
+    var batch = pendingRows;
+    pendingRows = [];
     if (!rows) return;
-    if (rows.firstChild) rows.insertBefore(tr, rows.firstChild);
-    else rows.appendChild(tr);
 
-    while (rows.children.length > 50) {
+    // Newest first, inserted above the existing rows in a single DOM operation.
+    var frag = document.createDocumentFragment();
+    for (var i = batch.length - 1; i >= 0; i--) frag.appendChild(batch[i].tr);
+    if (rows.firstChild) rows.insertBefore(frag, rows.firstChild);
+    else rows.appendChild(frag);
+
+    while (rows.children.length > MAX_ROWS) {
       var last = rows.lastChild;
       if (!last) break;
       try {
@@ -564,10 +1029,19 @@ _JS_TEMPLATE = """(function() {
     }
   }
 
-function appendLog(line) {
+  function appendLog(line) {
+    logLines.push(line);
+    if (logLines.length > MAX_LOG_LINES) logLines.splice(0, logLines.length - MAX_LOG_LINES);
+    logDirty = true;
+    scheduleFlush();
+  }
+
+  function flushLog() {
+    logDirty = false;
     var el = $('log');
     if (!el) return;
-    el.textContent += line + String.fromCharCode(10);
+    // Rewrites at most MAX_LOG_LINES lines, instead of growing one string forever.
+    el.textContent = logLines.join('\\n') + '\\n';
     el.scrollTop = el.scrollHeight;
   }
 
@@ -687,61 +1161,63 @@ function appendLog(line) {
 
   try { init(); } catch (e) { showError('init threw: ' + e); }
 })();"""
+# Stylesheet for the React page. Served as its own immutable, content-versioned asset
+# so reloads only revalidate the small HTML shell.
+_REACT_CSS = """:root {
+  --bg: #0b0f14;
+  --panel: #0f1723;
+  --border: #202938;
+  --text: #e6edf3;
+  --muted: rgba(230,237,243,0.72);
+  --bad: rgba(248, 81, 73, 0.95);
+  --warn: rgba(245, 159, 0, 0.95);
+  --ok: rgba(63, 185, 80, 0.95);
+}
+body { margin: 0; background: var(--bg); color: var(--text); font-family: system-ui, -apple-system, Segoe UI, Roboto, sans-serif; }
+header { padding: 12px 16px; border-bottom: 1px solid var(--border); display:flex; align-items: baseline; gap: 12px; }
+header h1 { font-size: 16px; margin: 0; font-weight: 600; }
+header .status { font-size: 12px; opacity: 0.85; }
+header .build { margin-left: auto; opacity: 0.55; font-size: 11px; }
+main { padding: 16px; display: grid; gap: 12px; }
+.grid { display: grid; gap: 12px; grid-template-columns: repeat(auto-fit, minmax(260px, 1fr)); }
+.card { background: var(--panel); border: 1px solid var(--border); border-radius: 10px; padding: 12px; }
+.card h2 { font-size: 13px; margin: 0 0 8px; opacity: 0.9; }
+.kv { display: grid; grid-template-columns: 140px 1fr; gap: 4px 10px; font-size: 13px; }
+.kv div:nth-child(odd) { opacity: 0.75; }
+.row { display:flex; gap: 10px; align-items: center; flex-wrap: wrap; }
+.btn { border: 1px solid var(--border); background: rgba(255,255,255,0.02); color: var(--text); border-radius: 8px; padding: 6px 10px; cursor:pointer; font-size: 12px; }
+.btn:hover { background: rgba(255,255,255,0.04); }
+.sel { border: 1px solid var(--border); background: rgba(255,255,255,0.02); color: var(--text); border-radius: 8px; padding: 6px 10px; font-size: 12px; }
+.muted { color: var(--muted); }
+.pill { font-size: 11px; padding: 2px 8px; border-radius: 999px; border: 1px solid var(--border); }
+.pill.ok { border-color: rgba(63,185,80,0.35); color: rgba(63,185,80,0.95); background: rgba(63,185,80,0.07); }
+.pill.warn { border-color: rgba(245,159,0,0.35); color: rgba(245,159,0,0.95); background: rgba(245,159,0,0.07); }
+.pill.bad { border-color: rgba(248,81,73,0.35); color: rgba(248,81,73,0.95); background: rgba(248,81,73,0.07); }
+.chartWrap { display:grid; gap: 8px; }
+.chartHead { display:flex; gap: 10px; align-items: baseline; flex-wrap: wrap; }
+.legend { display:flex; gap: 10px; flex-wrap: wrap; font-size: 12px; opacity: 0.95; }
+.legend label { display:flex; gap: 6px; align-items:center; cursor:pointer; }
+.legend .sw { width: 10px; height: 10px; border-radius: 2px; background: rgba(255,255,255,0.35); border: 1px solid rgba(255,255,255,0.15); }
+.svgBox { width: 100%; height: 220px; border: 1px solid var(--border); border-radius: 10px; background: rgba(0,0,0,0.12); }
+.tooltip { font-family: ui-monospace, SFMono-Regular, Menlo, Monaco, Consolas, monospace; font-size: 12px; white-space: pre; }
+.ticker { font-family: ui-monospace, SFMono-Regular, Menlo, Monaco, Consolas, monospace; font-size: 12px; white-space: pre; max-height: 200px; overflow:auto; }
+table { width: 100%; border-collapse: collapse; font-size: 12px; }
+th, td { border-bottom: 1px solid var(--border); padding: 6px 8px; text-align: left; }
+th { opacity: 0.8; font-weight: 600; }
+.err { border: 1px solid rgba(248,81,73,0.55); background: rgba(248,81,73,0.08); border-radius: 10px; padding: 12px; }
+.err pre { margin: 0; white-space: pre-wrap; word-break: break-word; }
+a { color: rgba(88,166,255,0.95); text-decoration: none; }
+a:hover { text-decoration: underline; }
+"""
+
+
 _REACT_HTML_TEMPLATE = """<!doctype html>
 <html lang="en">
 <head>
   <meta charset="utf-8" />
   <meta name="viewport" content="width=device-width, initial-scale=1" />
-  <meta http-equiv="Cache-Control" content="no-store" />
-  <meta http-equiv="Pragma" content="no-cache" />
   <title>GoodWe Control - React</title>
-  <style>
-    :root {
-      --bg: #0b0f14;
-      --panel: #0f1723;
-      --border: #202938;
-      --text: #e6edf3;
-      --muted: rgba(230,237,243,0.72);
-      --bad: rgba(248, 81, 73, 0.95);
-      --warn: rgba(245, 159, 0, 0.95);
-      --ok: rgba(63, 185, 80, 0.95);
-    }
-    body { margin: 0; background: var(--bg); color: var(--text); font-family: system-ui, -apple-system, Segoe UI, Roboto, sans-serif; }
-    header { padding: 12px 16px; border-bottom: 1px solid var(--border); display:flex; align-items: baseline; gap: 12px; }
-    header h1 { font-size: 16px; margin: 0; font-weight: 600; }
-    header .status { font-size: 12px; opacity: 0.85; }
-    header .build { margin-left: auto; opacity: 0.55; font-size: 11px; }
-    main { padding: 16px; display: grid; gap: 12px; }
-    .grid { display: grid; gap: 12px; grid-template-columns: repeat(auto-fit, minmax(260px, 1fr)); }
-    .card { background: var(--panel); border: 1px solid var(--border); border-radius: 10px; padding: 12px; }
-    .card h2 { font-size: 13px; margin: 0 0 8px; opacity: 0.9; }
-    .kv { display: grid; grid-template-columns: 140px 1fr; gap: 4px 10px; font-size: 13px; }
-    .kv div:nth-child(odd) { opacity: 0.75; }
-    .row { display:flex; gap: 10px; align-items: center; flex-wrap: wrap; }
-    .btn { border: 1px solid var(--border); background: rgba(255,255,255,0.02); color: var(--text); border-radius: 8px; padding: 6px 10px; cursor:pointer; font-size: 12px; }
-    .btn:hover { background: rgba(255,255,255,0.04); }
-    .sel { border: 1px solid var(--border); background: rgba(255,255,255,0.02); color: var(--text); border-radius: 8px; padding: 6px 10px; font-size: 12px; }
-    .muted { color: var(--muted); }
-    .pill { font-size: 11px; padding: 2px 8px; border-radius: 999px; border: 1px solid var(--border); }
-    .pill.ok { border-color: rgba(63,185,80,0.35); color: rgba(63,185,80,0.95); background: rgba(63,185,80,0.07); }
-    .pill.warn { border-color: rgba(245,159,0,0.35); color: rgba(245,159,0,0.95); background: rgba(245,159,0,0.07); }
-    .pill.bad { border-color: rgba(248,81,73,0.35); color: rgba(248,81,73,0.95); background: rgba(248,81,73,0.07); }
-    .chartWrap { display:grid; gap: 8px; }
-    .chartHead { display:flex; gap: 10px; align-items: baseline; flex-wrap: wrap; }
-    .legend { display:flex; gap: 10px; flex-wrap: wrap; font-size: 12px; opacity: 0.95; }
-    .legend label { display:flex; gap: 6px; align-items:center; cursor:pointer; }
-    .legend .sw { width: 10px; height: 10px; border-radius: 2px; background: rgba(255,255,255,0.35); border: 1px solid rgba(255,255,255,0.15); }
-    .svgBox { width: 100%; height: 220px; border: 1px solid var(--border); border-radius: 10px; background: rgba(0,0,0,0.12); }
-    .tooltip { font-family: ui-monospace, SFMono-Regular, Menlo, Monaco, Consolas, monospace; font-size: 12px; white-space: pre; }
-    .ticker { font-family: ui-monospace, SFMono-Regular, Menlo, Monaco, Consolas, monospace; font-size: 12px; white-space: pre; max-height: 200px; overflow:auto; }
-    table { width: 100%; border-collapse: collapse; font-size: 12px; }
-    th, td { border-bottom: 1px solid var(--border); padding: 6px 8px; text-align: left; }
-    th { opacity: 0.8; font-weight: 600; }
-    .err { border: 1px solid rgba(248,81,73,0.55); background: rgba(248,81,73,0.08); border-radius: 10px; padding: 12px; }
-    .err pre { margin: 0; white-space: pre-wrap; word-break: break-word; }
-    a { color: rgba(88,166,255,0.95); text-decoration: none; }
-    a:hover { text-decoration: underline; }
-  </style>
+  <link rel="stylesheet" href="/react_app.css?v=__CSS_VERSION__" />
 </head>
 <body data-build="__BUILD__" data-mode="__MODE__">
   <header>
@@ -807,7 +1283,7 @@ _REACT_HTML_TEMPLATE = """<!doctype html>
         }
 
         function bootApp() {
-          load('/react_app.js?v=__BUILD__', function(){}, function(){ bootError('failed to load /react_app.js'); });
+          load('/react_app.js?v=__APP_JS_VERSION__', function(){}, function(){ bootError('failed to load /react_app.js'); });
         }
 
         function cdnOrDie() {
@@ -1917,47 +2393,38 @@ function EventTable(props) {
   }
 })();"""
 
-@app.get("/js_ping")
-def js_ping() -> Response:
+def js_ping(request: Request) -> Response:
     # Used by the browser to confirm JS executed.
     logger.debug("js_ping")
     return Response(content=b"ok", media_type="text/plain", headers={"cache-control": "no-store"})
 
 
 
+_IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+
 def _serve_static_file(abs_path: str, media_type: str) -> Response:
     """Serve a local file under ui_static/.
 
     We keep this very small/specific (rather than a generic directory listing) to avoid
     accidentally exposing files. Missing files return 404 so the UI can fall back to CDN.
+    Files are streamed by FileResponse (sendfile where the server supports it) instead
+    of being read into memory on every request.
     """
     if not os.path.isfile(abs_path):
         return Response(content=b"not found", media_type="text/plain", status_code=404, headers={"cache-control": "no-store"})
-    try:
-        with open(abs_path, "rb") as f:
-            data = f.read()
-    except Exception:
-        logger.exception("static read failed path=%s", abs_path)
-        return Response(content=b"error", media_type="text/plain", status_code=500, headers={"cache-control": "no-store"})
 
-    return Response(
-        content=data,
-        media_type=media_type,
-        headers={"cache-control": "public, max-age=31536000, immutable"},
-    )
+    return FileResponse(abs_path, media_type=media_type, headers={"cache-control": _IMMUTABLE_CACHE})
 
 
-@app.get("/vendor/react.production.min.js")
-def vendor_react_prod() -> Response:
+def vendor_react_prod(request: Request) -> Response:
     return _serve_static_file(os.path.join(VENDOR_DIR, "react.production.min.js"), "application/javascript; charset=utf-8")
 
 
-@app.get("/vendor/react-dom.production.min.js")
-def vendor_react_dom_prod() -> Response:
+def vendor_react_dom_prod(request: Request) -> Response:
     return _serve_static_file(os.path.join(VENDOR_DIR, "react-dom.production.min.js"), "application/javascript; charset=utf-8")
 
 
-@app.get("/classic", response_class=HTMLResponse)
 def classic_index(request: Request) -> HTMLResponse:
     refresh_sec = _q_int(request, "refresh", "UI_REFRESH_SEC", "ui_refresh_sec", default=UI_REFRESH_SEC_DEFAULT)
     if refresh_sec is None:
@@ -2013,7 +2480,7 @@ def classic_index(request: Request) -> HTMLResponse:
         status += " - SSE mode"
 
     refresh_label = "off (SSE live)" if refresh_sec == 0 else f"{refresh_sec}s (server refresh)"
-    script_tag = "" if nojs else f'<script src="/app.js?v={BUILD_ID}"></script>'
+    script_tag = "" if nojs else f'<script src="/app.js?v={_APP_JS_VERSION}"></script>'
 
     html_doc = _HTML_TEMPLATE
     html_doc = html_doc.replace("__META_REFRESH__", meta_refresh)
@@ -2031,9 +2498,9 @@ def classic_index(request: Request) -> HTMLResponse:
 
     return HTMLResponse(content=html_doc, headers={"cache-control": "no-store"})
 
-@app.get("/", response_class=HTMLResponse)
-def index(request: Request) -> HTMLResponse:
-    # React-based UI (served without a build step).
+def _render_index() -> bytes:
+    # Everything substituted here comes from env vars read at import, so the page is
+    # identical for the lifetime of the process and is rendered exactly once.
     mode = "proxied" if UI_PROXY_API else "direct"
     html_doc = _REACT_HTML_TEMPLATE
     html_doc = html_doc.replace("__BUILD__", BUILD_ID)
@@ -2041,41 +2508,215 @@ def index(request: Request) -> HTMLResponse:
     html_doc = html_doc.replace("__DB_PATH__", _html_escape(DB_PATH))
     html_doc = html_doc.replace("__API_UPSTREAM__", _html_escape(API_UPSTREAM))
     html_doc = html_doc.replace("__CDN_FALLBACK__", "true" if UI_REACT_CDN_FALLBACK else "false")
-    return HTMLResponse(content=html_doc, headers={"cache-control": "no-store"})
+    html_doc = html_doc.replace("__CSS_VERSION__", _asset_version(_REACT_CSS_BYTES))
+    html_doc = html_doc.replace("__APP_JS_VERSION__", _asset_version(_REACT_APP_JS_BYTES))
+    return html_doc.encode("utf-8")
+
+
+def _etag_for(data: bytes) -> str:
+    return '"' + hashlib.sha1(data).hexdigest() + '"'
+
+
+def _minify_js(src: str) -> bytes:
+    return (rjsmin.jsmin(src) if rjsmin is not None else src).encode("utf-8")
+
+
+def _minify_css(src: str) -> bytes:
+    return (rcssmin.cssmin(src) if rcssmin is not None else src).encode("utf-8")
+
+
+def _asset_version(data: bytes) -> str:
+    # Content hash used as the ?v= cache buster for immutable assets.
+    return hashlib.sha1(data).hexdigest()[:12]
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    inm = request.headers.get("if-none-match")
+    if not inm:
+        return False
+    for tag in inm.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag or tag == "*":
+            return True
+    return False
 
 
-@app.get("/react")
-def react_redirect() -> RedirectResponse:
+# Precompressed representations: encoding -> (body, headers for 200, headers for 304).
+_Variants = Dict[str, Tuple[bytes, Dict[str, str], Dict[str, str]]]
+
+
+def _precompress(data: bytes, cache_control: str) -> _Variants:
+    """Compress a fixed response body once, for every encoding we can serve.
+
+    Each variant gets its own strong ETag (derived from the identity ETag) since the
+    bytes on the wire differ. brotli is optional; gzip alone covers every browser.
+    """
+    # mtime=0 keeps the gzip bytes identical across restarts and workers.
+    bodies = {"identity": data, "gzip": gzip.compress(data, 9, mtime=0)}
+    if brotli is not None:
+        bodies["br"] = brotli.compress(data, quality=11)
+
+    base = _etag_for(data)
+    out: _Variants = {}
+    for enc, body in bodies.items():
+        etag = base if enc == "identity" else base[:-1] + "-" + enc + '"'
+        not_modified = {"cache-control": cache_control, "etag": etag, "vary": "accept-encoding"}
+        headers = dict(not_modified)
+        if enc != "identity":
+            headers["content-encoding"] = enc
+        out[enc] = (body, headers, not_modified)
+    return out
+
+
+def _negotiate_encoding(request: Request, variants: _Variants) -> str:
+    ae = request.headers.get("accept-encoding")
+    if not ae:
+        return "identity"
+    offered = set()
+    for part in ae.split(","):
+        name, _, params = part.partition(";")
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        offered.add(name.strip().lower())
+    for enc in ("br", "gzip"):
+        if enc in offered and enc in variants:
+            return enc
+    return "identity"
+
+
+def _variant_response(request: Request, variants: _Variants, media_type: str) -> Response:
+    body, headers, not_modified = variants[_negotiate_encoding(request, variants)]
+    if _etag_matches(request, headers["etag"]):
+        return Response(status_code=304, headers=not_modified)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+# The index page links its stylesheet and script by content hash, so both can be cached
+# forever; a changed file gets a new URL.
+_REACT_CSS_BYTES = _minify_css(_REACT_CSS)
+_REACT_APP_JS_BYTES = _minify_js(_REACT_APP_JS)
+_REACT_CSS_VARIANTS = _precompress(_REACT_CSS_BYTES, _IMMUTABLE_CACHE)
+_REACT_APP_JS_VARIANTS = _precompress(_REACT_APP_JS_BYTES, _IMMUTABLE_CACHE)
+
+# no-cache (not no-store): the browser keeps the page but revalidates every load, so a
+# restart with a new BUILD_ID is picked up immediately while repeat loads cost a 304.
+_INDEX_VARIANTS = _precompress(_render_index(), "no-cache")
+
+
+async def index(request: Request) -> Response:
+    # React-based UI (served without a build step). Async: no threadpool hop needed.
+    return _variant_response(request, _INDEX_VARIANTS, "text/html; charset=utf-8")
+
+
+def react_redirect(request: Request) -> RedirectResponse:
     return RedirectResponse(url="/", status_code=307)
 
 
-@app.get("/react_app.js")
-def react_app_js() -> Response:
-    return Response(
-        content=_REACT_APP_JS,
-        media_type="application/javascript; charset=utf-8",
-        headers={"cache-control": "no-store"},
-    )
+# The classic JS bundle is a fixed string: encode and compress it once. The classic page
+# links it by content hash, so like the React assets it can be cached forever.
+_APP_JS_BYTES = _minify_js(_JS_TEMPLATE)
+_APP_JS_VERSION = _asset_version(_APP_JS_BYTES)
+_APP_JS_VARIANTS = _precompress(_APP_JS_BYTES, _IMMUTABLE_CACHE)
 
-@app.get("/app.js")
-def app_js() -> Response:
-    return Response(
-        content=_JS_TEMPLATE,
-        media_type="application/javascript; charset=utf-8",
-        headers={"cache-control": "no-store"},
-    )
+
+async def react_app_js(request: Request) -> Response:
+    return _variant_response(request, _REACT_APP_JS_VARIANTS, "application/javascript; charset=utf-8")
+
+
+async def react_app_css(request: Request) -> Response:
+    return _variant_response(request, _REACT_CSS_VARIANTS, "text/css; charset=utf-8")
+
+
+async def app_js(request: Request) -> Response:
+    return _variant_response(request, _APP_JS_VARIANTS, "application/javascript; charset=utf-8")
+
+
+# Only attached to routes whose bodies are built per request: the fixed pages are served
+# precompressed, and the SSE route stays free of the per-message middleware wrapper.
+# Level 6: most of level 9's ratio for a fraction of the CPU on every response.
+_GZIP = [Middleware(GZipMiddleware, minimum_size=UI_GZIP_MIN_BYTES, compresslevel=6)] if UI_GZIP_MIN_BYTES else None
+
+# Plain Starlette: none of these handlers use FastAPI's dependency injection, request
+# models or OpenAPI schema, so the extra per-request machinery bought nothing.
+# Order matters: /api/sse/* must be matched before the catch-all /api/*.
+app = Starlette(
+    routes=[
+        Route("/api/sse/{path:path}", proxy_sse, methods=["GET"]),
+        Route("/api/{path:path}", proxy_api, methods=_PROXY_METHODS, middleware=_GZIP),
+        Route("/", index, methods=["GET"]),
+        Route("/classic", classic_index, methods=["GET"], middleware=_GZIP),
+        Route("/react", react_redirect, methods=["GET"]),
+        Route("/react_app.js", react_app_js, methods=["GET"]),
+        Route("/react_app.css", react_app_css, methods=["GET"]),
+        Route("/app.js", app_js, methods=["GET"]),
+        Route("/js_ping", js_ping, methods=["GET"]),
+        Route("/vendor/react.production.min.js", vendor_react_prod, methods=["GET"]),
+        Route("/vendor/react-dom.production.min.js", vendor_react_dom_prod, methods=["GET"]),
+    ],
+    lifespan=_lifespan,
+)
+
+
+def _uring_loop_factory() -> asyncio.AbstractEventLoop:
+    # Opt-in io_uring event loop (UI_EVENT_LOOP=uring, Linux 5.11+). Handed to uvicorn as
+    # a loop factory rather than a global policy so spawned workers pick it up too.
+    import uringcore
+
+    return uringcore.EventLoopPolicy().new_event_loop()
 
 
 if __name__ == "__main__":
+    import importlib.util
+
     import uvicorn
 
     # Rotating file logs (LOG_DIR/ui.log) + optional stdout
-    debug_default = _env("DEBUG", "").strip().lower() in ("1", "true", "yes", "y", "on")
+    debug_default = _env_bool("DEBUG", "")
     setup_logging("ui", debug_default=debug_default)
+    _configure_access_logging()
+
+    loop: Any = "uvloop" if sys.platform != "win32" else "asyncio"
+    if UI_EVENT_LOOP == "uring":
+        if importlib.util.find_spec("uringcore") is None:
+            logger.warning("[start] UI_EVENT_LOOP=uring but uringcore is not installed; using %s", loop)
+        else:
+            loop = "ui_server:_uring_loop_factory" if UI_WORKERS > 1 else _uring_loop_factory
+
+    logger.info(
+        "[start] ui host=%s port=%s workers=%s api_upstream=%s ui_proxy_api=%s db=%s",
+        UI_HOST, UI_PORT, UI_WORKERS, API_UPSTREAM, UI_PROXY_API, DB_PATH,
+    )
 
-    host = _env("UI_HOST", "0.0.0.0")
-    port = _env_int("UI_PORT", 8000)
-
-    logger.info("[start] ui host=%s port=%s api_upstream=%s ui_proxy_api=%s db=%s", host, port, API_UPSTREAM, UI_PROXY_API, DB_PATH)
-
-    uvicorn.run(app, host=host, port=port, log_level="info", log_config=None)
+    if UI_WORKERS > 1:
+        # Workers are fresh processes that re-import this module: pin the build id so
+        # every worker renders the same pages/ETags, and have each one set up logging
+        # (this __main__ block does not run there).
+        os.environ["UI_BUILD_ID"] = BUILD_ID
+        os.environ["UI_WORKER_LOGGING"] = "1"
+
+    # Access log only on request (each line is a formatted record + file write), and
+    # no Server/Date headers: proxied responses already carry the upstream's copies.
+    # uvloop/httptools are requested explicitly (see requirements.txt) so a missing
+    # install fails loudly instead of silently falling back to asyncio + h11. The
+    # optional uring loop is the one exception, as it is not a hard dependency.
+    # Multiple workers share one listening socket and each has its own upstream pool.
+    uvicorn.run(
+        "ui_server:app" if UI_WORKERS > 1 else app,
+        host=UI_HOST,
+        port=UI_PORT,
+        workers=UI_WORKERS,
+        loop=loop,
+        http="httptools",
+        log_level="info",
+        log_config=None,
+        access_log=UI_ACCESS_LOG,
+        server_header=False,
+        date_header=False,
+    )